@@ -2,9 +2,18 @@
 # Importa as bibliotecas necessárias para o funcionamento do aplicativo.
 import streamlit as st  # A biblioteca principal para criar a interface web do aplicativo.
 import pandas as pd     # Fundamental para manipulação e análise de dados (planilhas, tabelas).
-import datetime         # Para trabalhar com datas (não usado diretamente, mas o pandas o utiliza).
-import requests         # Para fazer requisições HTTP e buscar dados da internet (no caso, da planilha).
-import io               # Para tratar dados em memória como se fossem arquivos (usado para ler o CSV).
+import numpy as np      # Para cálculos numéricos rápidos com arrays (usado no cálculo do ranking).
+
+# O Numba é opcional: se estiver instalado, o laço principal do ranking é compilado para código nativo.
+# Sem ele, '@njit' vira um decorator que não faz nada e as mesmas funções rodam em Python puro.
+try:
+    from numba import njit
+    _NUMBA_AVAILABLE = True
+except ImportError:
+    _NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        return lambda funcao: funcao
 
 
 # --- CONFIGURAÇÃO DA PÁGINA ---
@@ -30,13 +39,32 @@ BONUS_UPSET = 5         # Bônus por "zebra": quando um jogador com menos pontos
 
 # --- FUNÇÕES DE CARREGAMENTO E CÁLCULO ---
 
+# O decorator @st.cache_resource guarda objetos que devem ser reaproveitados (e não copiados)
+# entre execuções e usuários, como conexões. Assim a conexão HTTP (e o handshake TLS) é reutilizada
+# a cada atualização dos dados, em vez de abrir um socket novo a cada 10 minutos.
+@st.cache_resource
+def _get_session():
+    """Cria a sessão HTTP compartilhada usada para baixar a planilha."""
+    # O 'requests' (requisições HTTP) só é importado aqui, quando os dados precisam ser baixados,
+    # deixando a inicialização do app mais leve. O Python guarda o módulo após a primeira importação.
+    import requests
+    sessao = requests.Session()
+    sessao.headers['User-Agent'] = 'pingpong-rank'
+    return sessao
+
+@st.cache_resource
+def _get_ultimo_download():
+    """Guarda o ETag e o DataFrame do último download, usados para requisições condicionais."""
+    return {}
+
 # O decorator @st.cache_data é uma otimização poderosa do Streamlit.
 # Ele armazena o resultado da função em cache. Se a função for chamada novamente
 # com os mesmos parâmetros, o Streamlit retorna o resultado salvo em vez de
 # executar a função de novo. Isso economiza tempo e recursos.
 # O `ttl=600` (Time To Live) define que o cache expira após 600 segundos (10 minutos),
 # forçando o app a buscar dados atualizados da planilha periodicamente.
-@st.cache_data(ttl=600)
+# O `show_spinner` exibe uma mensagem enquanto os dados estão sendo baixados.
+@st.cache_data(ttl=600, show_spinner="Atualizando ranking…")
 def load_data():
     """Carrega os dados da planilha pública do Google Sheets de forma robusta."""
     try:
@@ -46,24 +74,36 @@ def load_data():
         # Constrói a URL especial que permite baixar a planilha no formato CSV.
         csv_url = f"https://docs.google.com/spreadsheets/d/{sheet_id}/gviz/tq?tqx=out:csv&sheet={sheet_name}"
         
-        # Faz a requisição para obter os dados da URL.
-        response = requests.get(csv_url)
-        # Verifica se a requisição foi bem-sucedida (código 200). Se não, levanta um erro.
-        response.raise_for_status()
-        
-        # Decodifica o conteúdo da resposta (que vem em bytes) para uma string de texto.
-        content = response.content.decode('utf-8')
-        
-        # Usa o pandas para ler a string de texto como se fosse um arquivo CSV.
-        # io.StringIO trata a string em memória como se fosse um arquivo, evitando criar arquivos temporários.
-        df = pd.read_csv(io.StringIO(content))
+        # Se a planilha já foi baixada antes, envia o ETag da última versão. Se nada mudou,
+        # o servidor responde 304 (Not Modified), sem conteúdo, e reaproveitamos os dados anteriores.
+        ultimo_download = _get_ultimo_download()
+        cabecalhos = {'If-None-Match': ultimo_download['etag']} if 'etag' in ultimo_download else {}
+
+        # Faz a requisição para obter os dados da URL, reaproveitando a sessão HTTP.
+        # 'stream=True' evita baixar o conteúdo inteiro para a memória antes de começar a ler.
+        with _get_session().get(csv_url, headers=cabecalhos, timeout=10, stream=True) as response:
+            if response.status_code == 304:
+                return ultimo_download['df']
+            # Verifica se a requisição foi bem-sucedida (código 200). Se não, levanta um erro.
+            response.raise_for_status()
+
+            # O pandas lê o CSV direto da conexão, decodificando o texto no próprio parser em C,
+            # sem criar cópias intermediárias do conteúdo (bytes -> string -> arquivo em memória).
+            # 'decode_content' descompacta a resposta caso o servidor a envie comprimida (gzip).
+            response.raw.decode_content = True
+            # As datas já são convertidas durante a leitura, usando o formato conhecido (dd/mm/aaaa).
+            df = pd.read_csv(
+                response.raw, encoding='utf-8', engine='c',
+                parse_dates=['Data'], date_format='%d/%m/%Y'
+            )
         
         # --- Limpeza e Tratamento dos Dados ---
         # É uma boa prática limpar os dados logo após o carregamento.
         
         # Remove linhas que estão completamente vazias.
         df.dropna(how='all', inplace=True)
-        # Converte a coluna 'Data' para o formato de data do pandas, tratando erros.
+        # Garante que a coluna 'Data' esteja no formato de data do pandas: se a planilha tiver alguma
+        # data inválida, a leitura acima a mantém como texto, e aqui ela é convertida tratando os erros.
         # 'coerce' transforma datas inválidas em NaT (Not a Time).
         df['Data'] = pd.to_datetime(df['Data'], format='%d/%m/%Y', errors='coerce')
         # Converte as colunas de resultado para números inteiros.
@@ -73,6 +113,23 @@ def load_data():
         df['Resultado_J2'] = pd.to_numeric(df['Resultado_J2'], errors='coerce').fillna(0).astype(int)
         # Remove quaisquer linhas onde a data não pôde ser convertida, garantindo a integridade.
         df.dropna(subset=['Data'], inplace=True)
+
+        # Converte os nomes dos jogadores em IDs inteiros pequenos (0, 1, 2, ...), na ordem em que aparecem
+        # na planilha. O cálculo do ranking trabalha só com esses IDs (nomes faltando recebem -1),
+        # e a lista de nomes fica guardada nos metadados do DataFrame ('attrs'). Ela é guardada como tupla
+        # simples: o Streamlit consegue serializá-la e o pandas não tenta compará-la ao combinar DataFrames.
+        codigos, jogadores = pd.factorize(pd.concat([df['Jogador_1'], df['Jogador_2']]))
+        df['J1_id'] = codigos[:len(df)].astype('int16')
+        df['J2_id'] = codigos[len(df):].astype('int16')
+        df.attrs['players'] = tuple(jogadores)
+
+        # Ordena as partidas por data e ID uma única vez aqui ('mergesort' é estável), para que o
+        # cálculo do ranking possa percorrê-las em sequência, sem filtrar ou ordenar cada dia.
+        df = df.sort_values(['Data', 'ID_Partida'], kind='mergesort').reset_index(drop=True)
+
+        # Guarda o ETag (se o servidor enviar um) junto com os dados para a próxima atualização.
+        if 'ETag' in response.headers:
+            ultimo_download.update(etag=response.headers['ETag'], df=df)
         
         return df
     except Exception as e:
@@ -82,82 +139,212 @@ def load_data():
         # Retorna um DataFrame vazio para que o resto do app não falhe.
         return pd.DataFrame()
 
+# 'cache=True' salva o código compilado pelo Numba em disco, evitando recompilar quando o app reinicia.
+@njit(cache=True)
+def _selecionar_top3(pontuacoes, bonus_por_jogador):
+    """Marca em `bonus_por_jogador` o bônus por vencer cada um dos 3 primeiros do ranking (e 0 para os demais)."""
+    n_players = len(pontuacoes)
+    # 'np.partition' encontra a 3ª maior pontuação sem ordenar tudo; os candidatos ao Top 3 são
+    # os jogadores com pelo menos essa pontuação (mais de 3 apenas em caso de empate).
+    if n_players > 3:
+        terceira_maior = np.partition(pontuacoes, n_players - 3)[n_players - 3]
+        candidatos = np.flatnonzero(pontuacoes >= terceira_maior)
+    else:
+        candidatos = np.arange(n_players)
+    # Ordena só os candidatos; 'mergesort' é estável, então empates mantêm o jogador que apareceu
+    # primeiro na planilha (mesmo critério do ranking exibido).
+    top3 = candidatos[np.argsort(-pontuacoes[candidatos], kind='mergesort')][:3]
+    bonus_top3 = np.array((BONUS_TOP_1, BONUS_TOP_2, BONUS_TOP_3), dtype=np.int32)
+    bonus_por_jogador[:] = 0
+    bonus_por_jogador[top3] = bonus_top3[:len(top3)]
+
+@njit(cache=True)
+def _pontos_das_vitorias(vencedores, perdedores, pontuacoes_inicio, bonus_por_jogador):
+    """Calcula, de uma só vez, os pontos de cada vitória do dia: pontos base + bônus de upset e de Top 3."""
+    # Se o vencedor tinha menos pontos que o perdedor no início do dia, é um "upset".
+    upset = pontuacoes_inicio[vencedores] < pontuacoes_inicio[perdedores]
+    return PONTOS_VITORIA + np.where(upset, BONUS_UPSET, 0) + bonus_por_jogador[perdedores]
+
+@njit(cache=True)
+def _aplicar_partidas(vencedores, perdedores, pontos_vencedores, pontuacoes, pontos_ganhos):
+    """Aplica os pontos do dia partida a partida, na ordem em que foram jogadas."""
+    for m in range(len(vencedores)):
+        vencedor, perdedor = vencedores[m], perdedores[m]
+        pontuacoes[vencedor] += pontos_vencedores[m]
+        # Garante que a pontuação de um jogador nunca fique abaixo de zero.
+        pontuacoes[perdedor] = max(0, pontuacoes[perdedor] + PONTOS_DERROTA)
+        pontos_ganhos[vencedor] += pontos_vencedores[m]
+        pontos_ganhos[perdedor] += PONTOS_DERROTA
+
+def _aplicar_partidas_numpy(vencedores, perdedores, pontos_vencedores, pontuacoes, pontos_ganhos):
+    """Versão vetorizada de `_aplicar_partidas`, usada quando o Numba não está instalado."""
+    # Total de pontos perdidos por cada jogador no dia (cada derrota vale PONTOS_DERROTA).
+    perdas = PONTOS_DERROTA * np.bincount(perdedores, minlength=len(pontuacoes))
+    # O piso de zero pontos depende da ordem das partidas. Se algum jogador puder chegar a zero
+    # no meio do dia (mesmo perdendo todas as partidas antes de vencer qualquer uma), aplica
+    # as partidas uma a uma; caso contrário, a soma de uma só vez dá exatamente o mesmo resultado.
+    if (pontuacoes + perdas < 0).any():
+        _aplicar_partidas(vencedores, perdedores, pontos_vencedores, pontuacoes, pontos_ganhos)
+        return
+    # 'np.add.at' soma corretamente mesmo quando um jogador aparece em várias partidas do dia.
+    np.add.at(pontos_ganhos, vencedores, pontos_vencedores)
+    pontos_ganhos += perdas
+    pontuacoes += pontos_ganhos
+
+# Com o Numba, o laço partida a partida compilado é o mais rápido; sem ele, a versão vetorizada.
+_aplicar_dia = _aplicar_partidas if _NUMBA_AVAILABLE else _aplicar_partidas_numpy
+
+@njit(cache=True)
+def _calc_kernel(vencedores, perdedores, day_boundaries, n_players):
+    """Núcleo numérico do ranking: processa todas as partidas, dia a dia, usando apenas arrays de inteiros.
+
+    Cada partida é dada pelos IDs do vencedor e do perdedor (0 a n_players - 1; -1 indica nome faltando)
+    e as partidas do dia `d` são as posições `day_boundaries[d]` até `day_boundaries[d + 1]` dos arrays.
+    Retorna a pontuação de cada jogador ao final de cada dia e os pontos ganhos/perdidos em cada dia.
+    """
+    n_dias = len(day_boundaries) - 1
+    # Matrizes pré-alocadas (dias x jogadores) com o resultado de cada dia.
+    pontuacoes_por_dia = np.empty((n_dias, n_players), dtype=np.int32)
+    pontos_ganhos_por_dia = np.zeros((n_dias, n_players), dtype=np.int32)
+    # Todos começam com a pontuação inicial definida na constante.
+    pontuacoes = np.full(n_players, PONTOS_INICIAIS, dtype=np.int32)
+    # Bônus por vencer cada jogador (indexado pelo ID): só os 3 primeiros do dia anterior valem algo.
+    bonus_por_jogador = np.zeros(n_players, dtype=np.int32)
+
+    for dia in range(n_dias):
+        vencedores_dia = vencedores[day_boundaries[dia]:day_boundaries[dia + 1]]
+        perdedores_dia = perdedores[day_boundaries[dia]:day_boundaries[dia + 1]]
+        # Pula as partidas em que algum dos nomes dos jogadores está faltando.
+        validas = (vencedores_dia >= 0) & (perdedores_dia >= 0)
+        vencedores_dia, perdedores_dia = vencedores_dia[validas], perdedores_dia[validas]
+
+        # Os bônus só dependem do ranking no início do dia, então os pontos de todas as vitórias
+        # do dia são calculados antes de qualquer pontuação ser atualizada.
+        _selecionar_top3(pontuacoes, bonus_por_jogador)
+        pontos_vencedores = _pontos_das_vitorias(vencedores_dia, perdedores_dia, pontuacoes, bonus_por_jogador)
+        _aplicar_dia(vencedores_dia, perdedores_dia, pontos_vencedores, pontuacoes, pontos_ganhos_por_dia[dia])
+
+        pontuacoes_por_dia[dia] = pontuacoes
+
+    return pontuacoes_por_dia, pontos_ganhos_por_dia
+
+# O decorator @st.cache_resource guarda objetos "globais" (que não devem ser copiados) entre as execuções.
+# Aqui ele garante que o kernel seja preparado (e compilado pelo Numba) apenas uma vez por processo,
+# e não a cada interação, já que o Streamlit reexecuta o script inteiro.
+@st.cache_resource
+def _get_kernel():
+    """Retorna o kernel do ranking, já compilado com Numba (ou em Python puro, se indisponível)."""
+    if _NUMBA_AVAILABLE:
+        # Aquecimento: chama o kernel com arrays vazios (dos mesmos tipos usados de verdade) para
+        # que a compilação aconteça agora, e não no meio do primeiro cálculo de ranking.
+        vazio = np.zeros(0, dtype=np.int32)
+        _calc_kernel(vazio, vazio, np.zeros(1, dtype=np.int64), 0)
+    return _calc_kernel
+
+# O resultado do ranking também fica em cache: cada interação do usuário reexecuta o script inteiro,
+# mas enquanto as partidas não mudarem o ranking não precisa ser recalculado.
+# 'hash_funcs' ensina o Streamlit a identificar o DataFrame por um hash vetorizado apenas das colunas
+# usadas nos cálculos: bem mais barato que o hash padrão do Streamlit e, como reflete o conteúdo,
+# qualquer correção na planilha (placar, nome ou data) gera um novo resultado.
+COLUNAS_PARTIDAS = ['ID_Partida', 'Data', 'Jogador_1', 'Jogador_2', 'Resultado_J1', 'Resultado_J2']
+HASH_PARTIDAS = {pd.DataFrame: lambda d: int(pd.util.hash_pandas_object(d[COLUNAS_PARTIDAS], index=False).sum())}
+
+@st.cache_data(ttl=600, hash_funcs=HASH_PARTIDAS)
 def calculate_rankings(df):
-    """Calcula os rankings diários e estatísticas detalhadas a partir do histórico de partidas."""
+    """Calcula os rankings diários e estatísticas detalhadas a partir do histórico de partidas.
+
+    Espera o DataFrame produzido por `load_data`: ordenado por data e ID, com os IDs dos jogadores.
+    """
     # Verificação de segurança: se não houver dados, retorna estruturas vazias.
     if df.empty:
-        return {}, {}, {}
+        return {}, {}
+
+    # Nomes dos jogadores, indexados pelos IDs criados em load_data ('J1_id' e 'J2_id').
+    # Convertidos de volta para array para poderem ser reordenados de uma vez pelo ranking do dia.
+    jogadores = np.asarray(df.attrs['players'], dtype=object)
+
+    # As partidas já chegam ordenadas por data e ID (ver load_data), então basta extrair os arrays.
+    j1_ids, j2_ids, r1, r2 = (
+        df[c].to_numpy(dtype=np.int32) for c in ['J1_id', 'J2_id', 'Resultado_J1', 'Resultado_J2']
+    )
+    # Determina o vencedor e o perdedor de todas as partidas de uma só vez, sem 'if' por partida.
+    vence_j1 = r1 > r2
+    vencedores = np.where(vence_j1, j1_ids, j2_ids)
+    perdedores = np.where(vence_j1, j2_ids, j1_ids)
+
+    # Encontra, em uma única passada, as posições onde o dia muda (comparando cada partida com a anterior).
+    # As partidas do dia `d` vão de day_boundaries[d] até day_boundaries[d + 1].
+    dias = df['Data'].to_numpy().astype('datetime64[D]').view('i8')
+    day_boundaries = np.concatenate(([0], np.flatnonzero(np.diff(dias)) + 1, [len(df)]))
+    datas_unicas = list(df['Data'].iloc[day_boundaries[:-1]])
+
+    # Executa o cálculo pesado (compilado com Numba, se disponível).
+    pontuacoes_por_dia, pontos_ganhos_por_dia = _get_kernel()(
+        vencedores, perdedores, day_boundaries, len(jogadores)
+    )
 
-    # Pega uma lista de todos os jogadores únicos, buscando nomes das colunas 'Jogador_1' e 'Jogador_2'.
-    # '.values.ravel('K')' transforma as duas colunas em uma única lista de nomes.
-    jogadores = pd.unique(df[['Jogador_1', 'Jogador_2']].values.ravel('K'))
-    # Inicializa um dicionário para armazenar a pontuação de cada jogador.
-    # Todos começam com a pontuação inicial definida na constante.
-    pontuacoes = {jogador: PONTOS_INICIAIS for jogador in jogadores if pd.notna(jogador)}
-    
     # Dicionários que irão armazenar o estado do ranking e as estatísticas ao final de cada dia.
     rankings_diarios = {}
     stats_diarias = {}
-    # Obtém uma lista de todas as datas únicas em que ocorreram partidas, em ordem cronológica.
-    datas_unicas = sorted(df['Data'].unique())
-
-    # Itera sobre cada dia que teve partidas.
-    for data_atual in datas_unicas:
-        # Dicionário para rastrear quantos pontos cada jogador ganhou/perdeu *apenas neste dia*.
-        pontos_ganhos_dia = {jogador: 0 for jogador in pontuacoes}
-        # Obtém o ranking como estava *antes* das partidas do dia atual serem computadas.
-        ranking_anterior = sorted(pontuacoes.items(), key=lambda item: item[1], reverse=True)
-        # Cria um mapa (dicionário) do jogador para sua posição no ranking anterior. Ex: {'João': 1, 'Maria': 2}
-        # Isso é crucial para calcular bônus de "upset" e bônus contra o Top 3.
-        mapa_ranking_anterior = {jogador: i + 1 for i, (jogador, _) in enumerate(ranking_anterior)}
-
-        # Filtra apenas as partidas que ocorreram na data atual e as ordena pelo ID.
-        partidas_do_dia = df[df['Data'] == data_atual].sort_values(by='ID_Partida')
-
-        # Itera sobre cada partida do dia para calcular os pontos.
-        for _, partida in partidas_do_dia.iterrows():
-            j1, j2 = partida['Jogador_1'], partida['Jogador_2']
-            # Pula a partida se algum dos nomes dos jogadores estiver faltando.
-            if pd.isna(j1) or pd.isna(j2): continue
-            
-            res1, res2 = partida['Resultado_J1'], partida['Resultado_J2']
-            # Determina o vencedor e o perdedor da partida usando uma expressão condicional (ternário).
-            vencedor, perdedor = (j1, j2) if res1 > res2 else (j2, j1)
-
-            # Obtém a posição do vencedor e do perdedor no ranking do dia anterior.
-            rank_vencedor = mapa_ranking_anterior.get(vencedor, len(jogadores) + 1)
-            rank_perdedor = mapa_ranking_anterior.get(perdedor, len(jogadores) + 1)
-
-            # Define a pontuação base para vitória e derrota.
-            pontos_vencedor = PONTOS_VITORIA
-            pontos_perdedor = PONTOS_DERROTA
-
-            # Lógica de bônus:
-            # Se o rank do vencedor era maior (pior) que o do perdedor, é um "upset".
-            if rank_vencedor > rank_perdedor: pontos_vencedor += BONUS_UPSET
-            # Adiciona bônus por vencer um jogador do Top 3.
-            if rank_perdedor == 1: pontos_vencedor += BONUS_TOP_1
-            elif rank_perdedor == 2: pontos_vencedor += BONUS_TOP_2
-            elif rank_perdedor == 3: pontos_vencedor += BONUS_TOP_3
-            
-            # Atualiza a pontuação geral dos jogadores.
-            pontuacoes[vencedor] += pontos_vencedor
-            # Garante que a pontuação de um jogador nunca fique abaixo de zero.
-            pontuacoes[perdedor] = max(0, pontuacoes.get(perdedor, 0) + pontos_perdedor)
-            
-            # Registra os pontos ganhos/perdidos *neste dia* para os destaques.
-            pontos_ganhos_dia[vencedor] += pontos_vencedor
-            pontos_ganhos_dia[perdedor] += pontos_perdedor
-
-        # Ao final do dia, armazena o ranking atualizado (lista ordenada por pontos).
-        rankings_diarios[data_atual] = sorted(pontuacoes.items(), key=lambda item: item[1], reverse=True)
-        # Armazena também as estatísticas do dia (como os pontos ganhos).
-        stats_diarias[data_atual] = {'pontos_ganhos': pontos_ganhos_dia}
-
-    return rankings_diarios, stats_diarias, df
+    for dia, data_atual in enumerate(datas_unicas):
+        # Converte os arrays de volta para nomes: o ranking é uma lista ordenada de (jogador, pontos).
+        pontuacoes = pontuacoes_por_dia[dia]
+        ordem = np.argsort(-pontuacoes, kind='stable')
+        rankings_diarios[data_atual] = list(zip(jogadores[ordem], pontuacoes[ordem].tolist()))
+        # Armazena também as estatísticas do dia (como os pontos ganhos) e as partidas jogadas.
+        stats_diarias[data_atual] = {
+            # Pontos ganhos como uma tupla (nomes, pontos) de arrays alinhados pelo ID do jogador.
+            'pontos_ganhos': (jogadores, pontos_ganhos_por_dia[dia]),
+            # Posições (início, fim) das partidas do dia no DataFrame ordenado. Guardar só os índices, e não
+            # uma cópia das partidas, mantém o resultado em cache pequeno e rápido de recuperar.
+            'partidas': (int(day_boundaries[dia]), int(day_boundaries[dia + 1])),
+            # Datas já formatadas para exibição, convertidas uma única vez aqui (e guardadas em cache).
+            'data_formatada': data_atual.strftime('%d/%m/%Y'),
+            'data_por_extenso': data_atual.strftime('%d de %B de %Y'),
+            # Dia de competição anterior (None no primeiro dia), usado para comparar os rankings.
+            'data_anterior': datas_unicas[dia - 1] if dia > 0 else None,
+        }
+
+    return rankings_diarios, stats_diarias
+
+# As estatísticas de cada jogador também ficam em cache, identificadas pelo jogador e pelo DataFrame
+# (com o mesmo 'hash_funcs' do ranking). Voltar a um jogador já analisado não recalcula nada.
+@st.cache_data(ttl=600, hash_funcs=HASH_PARTIDAS)
+def _player_stats(df, jogador):
+    """Calcula vitórias, derrotas e o retrospecto contra cada adversário de um jogador."""
+    # Filtra o DataFrame para obter apenas as partidas do jogador.
+    df_jogador = df[(df['Jogador_1'] == jogador) | (df['Jogador_2'] == jogador)]
+
+    # Extrai as colunas relevantes como arrays do NumPy e faz as contagens de forma vetorizada (sem laços).
+    j1_arr, j2_arr, r1_arr, r2_arr = (
+        df_jogador[c].to_numpy() for c in ['Jogador_1', 'Jogador_2', 'Resultado_J1', 'Resultado_J2']
+    )
+    # Para cada partida: o jogador era o Jogador 1? E ele venceu a partida?
+    eh_j1 = j1_arr == jogador
+    venceu = np.where(eh_j1, r1_arr > r2_arr, r2_arr > r1_arr)
+
+    # Contagem de vitórias e derrotas.
+    vitorias = int(venceu.sum())
+    derrotas = len(venceu) - vitorias
+
+    # Identifica o adversário em cada partida e numera os adversários (0, 1, 2, ...) na ordem em que aparecem.
+    adversarios = np.where(eh_j1, j2_arr, j1_arr)
+    codigos, nomes_adversarios = pd.factorize(adversarios, use_na_sentinel=False)
+    # 'np.bincount' soma, para cada adversário, as vitórias e o total de partidas em uma única passada.
+    vitorias_contra = np.bincount(codigos, weights=venceu, minlength=len(nomes_adversarios)).astype(int)
+    derrotas_contra = np.bincount(codigos, minlength=len(nomes_adversarios)) - vitorias_contra
+    # Tabela com uma linha por adversário: vitórias e derrotas do jogador contra ele.
+    adversarios_df = pd.DataFrame(
+        {'vitorias': vitorias_contra, 'derrotas': derrotas_contra}, index=pd.Index(nomes_adversarios)
+    )
+
+    return vitorias, derrotas, adversarios_df
 
 # --- PÁGINA PRINCIPAL: RANKING DIÁRIO ---
 # Esta função é responsável por renderizar a primeira página do aplicativo.
+# O decorator @st.fragment faz com que, ao mudar a data selecionada, apenas esta função seja
+# reexecutada, e não o script inteiro (carregamento dos dados, menu lateral etc.).
+@st.fragment
 def pagina_ranking_diario(rankings_por_dia, stats_diarias, df_partidas):
     # Define o título principal da página.
     st.title("🏆 Ranking Diário de Ping-Pong")
@@ -174,21 +361,22 @@ def pagina_ranking_diario(rankings_por_dia, stats_diarias, df_partidas):
         "Selecione uma data para ver o ranking:",
         options=datas_disponiveis,
         # 'format_func' personaliza como as opções são exibidas para o usuário.
-        # Aqui, transforma o objeto de data em uma string legível (dd/mm/aaaa).
-        format_func=lambda date: pd.to_datetime(date).strftime('%d/%m/%Y')
+        # Aqui, mostra a data já formatada (dd/mm/aaaa) no cálculo do ranking, sem converter de novo.
+        format_func=lambda date: stats_diarias[date]['data_formatada']
     )
 
     # Se nenhuma data for selecionada, não faz mais nada.
     if not data_selecionada: return
 
     # --- DESTAQUES DO DIA ---
-    st.header(f"Destaques de {pd.to_datetime(data_selecionada).strftime('%d de %B de %Y')}")
+    st.header(f"Destaques de {stats_diarias[data_selecionada]['data_por_extenso']}")
     
     # Busca os pontos ganhos no dia selecionado.
-    pontos_dia = stats_diarias[data_selecionada]['pontos_ganhos']
-    # Encontra o jogador que mais pontuou no dia.
-    jogador_do_dia = max(pontos_dia, key=pontos_dia.get)
-    pontos_jogador_dia = pontos_dia[jogador_do_dia]
+    nomes_jogadores, pontos_dia = stats_diarias[data_selecionada]['pontos_ganhos']
+    # Encontra o jogador que mais pontuou no dia ('argmax' percorre o array em C, sem chamadas em Python).
+    indice_jogador_dia = int(pontos_dia.argmax())
+    jogador_do_dia = nomes_jogadores[indice_jogador_dia]
+    pontos_jogador_dia = int(pontos_dia[indice_jogador_dia])
 
     # Cria duas colunas para organizar os destaques lado a lado.
     col1, col2 = st.columns(2)
@@ -198,13 +386,13 @@ def pagina_ranking_diario(rankings_por_dia, stats_diarias, df_partidas):
         st.metric(label=jogador_do_dia, value=f"+{pontos_jogador_dia} pontos")
 
     # --- Lógica para Upset (Zebra) do Dia ---
-    # Filtra as partidas do dia selecionado.
-    partidas_dia = df_partidas[df_partidas['Data'] == data_selecionada]
+    # Busca as partidas do dia selecionado, usando as posições calculadas junto com o ranking.
+    inicio, fim = stats_diarias[data_selecionada]['partidas']
+    partidas_dia = df_partidas.iloc[inicio:fim]
     upsets = []
     
-    # Encontra a data anterior à data selecionada para comparar os rankings.
-    indice_data_atual = datas_disponiveis.index(data_selecionada)
-    data_anterior = datas_disponiveis[indice_data_atual + 1] if indice_data_atual + 1 < len(datas_disponiveis) else None
+    # Busca a data anterior à data selecionada (já calculada junto com o ranking) para comparar os rankings.
+    data_anterior = stats_diarias[data_selecionada]['data_anterior']
     
     # Carrega a pontuação do dia anterior.
     if data_anterior:
@@ -212,13 +400,12 @@ def pagina_ranking_diario(rankings_por_dia, stats_diarias, df_partidas):
         map_rank_ontem = dict(ranking_ontem_lista) # Converte a lista de tuplas em um dicionário {jogador: pontos}
     else:
         # Caso especial para o primeiro dia de competição, todos têm a pontuação inicial.
-        todos_jogadores = pd.unique(df_partidas[['Jogador_1', 'Jogador_2']].values.ravel('K'))
-        map_rank_ontem = {j: PONTOS_INICIAIS for j in todos_jogadores if pd.notna(j)}
+        # A tupla de jogadores já vem pronta de load_data (sem nomes faltando).
+        map_rank_ontem = {j: PONTOS_INICIAIS for j in df_partidas.attrs['players']}
 
-    # Itera sobre as partidas do dia para identificar os upsets.
-    for _, partida in partidas_dia.iterrows():
-        j1, j2 = partida['Jogador_1'], partida['Jogador_2']
-        res1, res2 = partida['Resultado_J1'], partida['Resultado_J2']
+    # Itera sobre as partidas do dia para identificar os upsets (usando arrays em vez de 'iterrows()').
+    colunas_dia = (partidas_dia[c].to_numpy() for c in ['Jogador_1', 'Jogador_2', 'Resultado_J1', 'Resultado_J2'])
+    for j1, j2, res1, res2 in zip(*colunas_dia):
         if pd.isna(j1) or pd.isna(j2): continue
         
         vencedor, perdedor = (j1, j2) if res1 > res2 else (j2, j1)
@@ -252,32 +439,25 @@ def pagina_ranking_diario(rankings_por_dia, stats_diarias, df_partidas):
         ranking_anterior_lista = rankings_por_dia.get(data_anterior, [])
         ranking_anterior = {jogador: i + 1 for i, (jogador, _) in enumerate(ranking_anterior_lista)}
 
-    # Cria colunas com larguras personalizadas para alinhar a tabela do ranking.
-    cols = st.columns([0.5, 3, 1.5, 1])
-    cols[0].markdown("**Pos.**")
-    cols[1].markdown("**Jogador**")
-    cols[2].markdown("**Pontos**")
-    cols[3].markdown("**Mudança**")
-    
-    # Itera sobre o ranking do dia selecionado para exibir cada jogador.
-    for i, (jogador, pontos) in enumerate(ranking_atual):
-        posicao_atual = i + 1
-        posicao_anterior = ranking_anterior.get(jogador) # Pega a posição do jogador no dia anterior.
-        
-        # Lógica para determinar o ícone de mudança de posição.
-        mudanca_str = "🆕" # 'Novo' se o jogador não estava no ranking anterior.
-        if posicao_anterior:
-            diff = posicao_anterior - posicao_atual # Posição anterior menor significa que subiu no ranking.
-            if diff > 0: mudanca_str = f"⬆️ {diff}"
-            elif diff < 0: mudanca_str = f"⬇️ {abs(diff)}"
-            else: mudanca_str = "➖"
-        
-        # Exibe os dados do jogador nas colunas.
-        cols = st.columns([0.5, 3, 1.5, 1])
-        cols[0].metric(label="", value=f"#{posicao_atual}") # Metric sem label para alinhar melhor.
-        cols[1].markdown(f"### {jogador}")
-        cols[2].markdown(f"### {pontos}")
-        cols[3].markdown(f"### {mudanca_str}")
+    # Monta a tabela do ranking inteira de uma vez e a exibe com um único 'st.dataframe',
+    # em vez de criar vários componentes para cada jogador (o que deixa a página lenta).
+    tabela_ranking = pd.DataFrame(ranking_atual, columns=['Jogador', 'Pontos'])
+    tabela_ranking.insert(0, 'Pos', np.arange(1, len(tabela_ranking) + 1))
+
+    # Lógica para determinar o ícone de mudança de posição, calculada para todos os jogadores de uma vez.
+    posicao_anterior = tabela_ranking['Jogador'].map(ranking_anterior) # NaN se não estava no ranking anterior.
+    diff = posicao_anterior - tabela_ranking['Pos'] # Posição anterior menor significa que subiu no ranking.
+    variacao = diff.abs().astype('Int64').astype(str)
+    tabela_ranking['Mudança'] = np.select(
+        [posicao_anterior.isna(), diff > 0, diff < 0],
+        ["🆕", "⬆️ " + variacao, "⬇️ " + variacao], # '🆕' se o jogador não estava no ranking anterior.
+        default="➖"
+    )
+
+    st.dataframe(
+        tabela_ranking, hide_index=True, use_container_width=True,
+        column_config={'Mudança': st.column_config.TextColumn()}
+    )
 
     # --- HISTÓRICO DE PARTIDAS DO DIA ---
     st.markdown("---")
@@ -288,29 +468,20 @@ def pagina_ranking_diario(rankings_por_dia, stats_diarias, df_partidas):
 
 # --- PÁGINA 2: ANÁLISE DE JOGADOR ---
 # Esta função é responsável por renderizar a segunda página do aplicativo.
+# Assim como a página de ranking, é um fragmento: trocar de jogador reexecuta apenas esta função.
+@st.fragment
 def pagina_analise_jogador(df_partidas):
     st.title("🔍 Análise de Jogadores")
     
-    # Cria uma lista ordenada de todos os jogadores únicos.
-    jogadores = sorted(pd.unique(df_partidas[['Jogador_1', 'Jogador_2']].values.ravel('K')))
+    # Cria uma lista ordenada de todos os jogadores únicos (tupla calculada uma única vez em load_data).
+    jogadores = sorted(df_partidas.attrs['players'])
     # Cria uma caixa de seleção para o usuário escolher um jogador.
     jogador_selecionado = st.selectbox("Selecione um jogador para analisar", jogadores)
 
     if not jogador_selecionado: return
 
-    # Filtra o DataFrame para obter apenas as partidas do jogador selecionado.
-    df_jogador = df_partidas[(df_partidas['Jogador_1'] == jogador_selecionado) | (df_partidas['Jogador_2'] == jogador_selecionado)]
-    
-    # Contagem de vitórias e derrotas.
-    vitorias = 0
-    derrotas = 0
-    for _, row in df_jogador.iterrows():
-        # Verifica se o jogador selecionado é o Jogador 1 e se sua pontuação foi maior.
-        if (row['Jogador_1'] == jogador_selecionado and row['Resultado_J1'] > row['Resultado_J2']) or \
-           (row['Jogador_2'] == jogador_selecionado and row['Resultado_J2'] > row['Resultado_J1']):
-            vitorias += 1
-        else:
-            derrotas += 1
+    # Estatísticas do jogador (calculadas uma vez por jogador e guardadas em cache).
+    vitorias, derrotas, adversarios = _player_stats(df_partidas, jogador_selecionado)
     
     total_jogos = vitorias + derrotas
     # Calcula a taxa de vitória, com uma verificação para evitar divisão por zero.
@@ -333,51 +504,46 @@ def pagina_analise_jogador(df_partidas):
     # --- Lógica de Carrasco e Freguês ---
     # Carrasco: adversário contra quem o jogador mais perdeu.
     # Freguês: adversário contra quem o jogador mais venceu.
-    adversarios = {}
-    for _, row in df_jogador.iterrows():
-        # Identifica o adversário na partida.
-        adversario = row['Jogador_2'] if row['Jogador_1'] == jogador_selecionado else row['Jogador_1']
-        # Identifica o vencedor da partida.
-        vencedor = row['Jogador_1'] if row['Resultado_J1'] > row['Resultado_J2'] else row['Jogador_2']
-        
-        # Se for o primeiro confronto com este adversário, inicializa seu registro.
-        if adversario not in adversarios:
-            adversarios[adversario] = {'vitorias': 0, 'derrotas': 0}
-        
-        # Contabiliza o resultado do confronto.
-        if vencedor == jogador_selecionado:
-            adversarios[adversario]['vitorias'] += 1
-        else:
-            adversarios[adversario]['derrotas'] += 1
-
-    if adversarios:
+    if not adversarios.empty:
         # Encontra o carrasco (maior número de derrotas para o jogador selecionado).
-        carrasco = max(adversarios, key=lambda k: adversarios[k]['derrotas'])
+        carrasco = adversarios['derrotas'].to_numpy().argmax()
         # Encontra o freguês (maior número de vitórias do jogador selecionado).
-        fregues = max(adversarios, key=lambda k: adversarios[k]['vitorias'])
+        fregues = adversarios['vitorias'].to_numpy().argmax()
         
         col1, col2 = st.columns(2)
         with col1:
             st.subheader("😈 Maior Carrasco")
-            if adversarios[carrasco]['derrotas'] > 0:
-                st.markdown(f"**{carrasco}** ({adversarios[carrasco]['derrotas']} derrotas)")
+            if adversarios['derrotas'].iat[carrasco] > 0:
+                st.markdown(f"**{adversarios.index[carrasco]}** ({adversarios['derrotas'].iat[carrasco]} derrotas)")
             else:
                 st.markdown("Ninguém!")
         with col2:
             st.subheader("😇 Maior Freguês")
-            if adversarios[fregues]['vitorias'] > 0:
-                st.markdown(f"**{fregues}** ({adversarios[fregues]['vitorias']} vitórias)")
+            if adversarios['vitorias'].iat[fregues] > 0:
+                st.markdown(f"**{adversarios.index[fregues]}** ({adversarios['vitorias'].iat[fregues]} vitórias)")
             else:
                 st.markdown("Ninguém!")
 
     st.markdown("---")
     st.subheader("Histórico de Partidas")
-    st.dataframe(df_jogador, use_container_width=True)
+    # Filtra o DataFrame para obter apenas as partidas do jogador selecionado.
+    df_jogador = df_partidas[(df_partidas['Jogador_1'] == jogador_selecionado) | (df_partidas['Jogador_2'] == jogador_selecionado)]
+    # Os IDs internos dos jogadores (usados só nos cálculos) não são exibidos.
+    st.dataframe(df_jogador.drop(columns=['J1_id', 'J2_id']), use_container_width=True)
 
 
 # --- NAVEGAÇÃO PRINCIPAL ---
 # Função principal que organiza a execução do aplicativo.
 def main():
+    # Botão para forçar a atualização dos dados, sem esperar o cache de 10 minutos expirar.
+    # Fica antes do carregamento para estar disponível mesmo quando a última tentativa falhou.
+    # Limpa também os caches calculados a partir dos dados, para que uma correção na planilha
+    # (placar ou nome errado) apareça imediatamente no ranking e na análise de jogadores.
+    if st.sidebar.button("🔄 Atualizar dados"):
+        load_data.clear()
+        calculate_rankings.clear()
+        _player_stats.clear()
+
     # 1. Carrega os dados das partidas.
     df_partidas = load_data()
     # Verificação crucial: se os dados não foram carregados, exibe um erro e para a execução.
@@ -386,7 +552,8 @@ def main():
         return
 
     # 2. Processa os dados brutos para calcular todos os rankings e estatísticas.
-    rankings_por_dia, stats_diarias, df_partidas = calculate_rankings(df_partidas)
+    # As páginas usam o DataFrame recém-carregado; a função devolve só os rankings e as estatísticas.
+    rankings_por_dia, stats_diarias = calculate_rankings(df_partidas)
 
     # 3. Cria o menu de navegação na barra lateral.
     st.sidebar.title("Navegação")